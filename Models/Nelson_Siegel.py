@@ -1,78 +1,214 @@
 import numpy as np
-from scipy.optimize import minimize
+from functools import partial
+from scipy.linalg import lstsq
+from scipy.optimize import minimize_scalar
+from Utils.parallel import parallel_map
 
 def nelson_siegel(params, maturities):
     beta0, beta1, beta2, lambd = params
 
-    # set a min value for lambda to account for 0 division in optimization problems
-    lambd = max(lambd, 1e-4)
-
-
-    # Safeguard maturities to avoid division by zero
-    t = np.where(maturities == 0, 1e-6, maturities)
-
-    alpha_1 = (1 - np.exp(-t/lambd))/(t/lambd)
-    alpha_2 = (1 - np.exp(-t/lambd))/(t/lambd) - np.exp(-t/lambd)
+    # Vectorized over maturities; at t = 0 the first loading takes its limit value 1
+    u = np.asarray(maturities, dtype=float) / lambd
+    e = np.exp(-u)
+    alpha_1 = np.divide(1 - e, u, out=np.ones_like(u), where=u != 0)
+    alpha_2 = alpha_1 - e
     return beta0 + beta1 * alpha_1 + beta2 * alpha_2
 
 # Error function to minimize to find optimal params
 def error_function(params, maturities, data):
-    data_hat = nelson_siegel(params, maturities)
-    return np.sum((data - data_hat) ** 2)
+    residuals = data - nelson_siegel(params, maturities)
+    return residuals @ residuals
 
 # We define ridge error function as
 def ridge_error_function(params, maturities, data, alpha=0.1):
-    data_hat = nelson_siegel(params, maturities)
-    error = np.sum((data - data_hat) ** 2)
-    regularization = alpha * (params[0]**2 + params[1]**2 + params[2]**2 + params[3]**2)
+    residuals = data - nelson_siegel(params, maturities)
+    error = residuals @ residuals
+    regularization = alpha * np.dot(params, params)
     return error + regularization
 
 
-def fit_nelson_siegel(maturities, yields, ridge=False, alpha=0.1, initial_params=None):
+# Nelson-Siegel factor loadings [1, alpha_1, alpha_2] for a given lambda, shape (n, 3)
+def _ns_basis(t, lambd):
+    u = t / lambd
+    e = np.exp(-u)
+    alpha_1 = (1 - e) / u
+    alpha_2 = alpha_1 - e
+    return np.column_stack([np.ones_like(t), alpha_1, alpha_2])
+
+
+def _solve_betas(basis, data, alpha=0.0):
+    """
+    Solve the betas in closed form for a fixed basis.
+
+    The model is linear in the betas once lambda is fixed, so they are the (ridge) least-squares
+    solution (basis'basis + alpha*I)^-1 basis'data. The ridge case is solved as an ordinary
+    least-squares problem on the basis augmented with sqrt(alpha)*I rows. `data` can be a vector or
+    a (n, n_curves) matrix of curves sharing the same maturities, in which case one beta column is
+    returned per curve.
+    """
+    if alpha > 0:
+        n_betas = basis.shape[1]
+        basis = np.vstack([basis, np.sqrt(alpha) * np.eye(n_betas)])
+        data = np.concatenate([data, np.zeros((n_betas,) + data.shape[1:])])
+    return lstsq(basis, data, lapack_driver="gelsd")[0]
+
+
+def _concentrated_error(basis, data, alpha, lambdas):
+    """
+    Error concentrated on the lambdas, for the basis they give: the betas are solved out in closed form and
+    the (ridge) error of the fit is returned, with the ridge penalty on both the betas and the `lambdas`. For
+    a (n, n_curves) `data` matrix of curves sharing the basis, one error is returned per curve.
+    """
+    betas = _solve_betas(basis, data, alpha)
+    residuals = data - basis @ betas
+    error = np.einsum("i...,i...->...", residuals, residuals)
+    return error + alpha * (np.einsum("i...,i...->...", betas, betas) + np.dot(lambdas, lambdas))
+
+
+def _make_concentrated_error(t):
+    """
+    `_concentrated_error` of the Nelson-Siegel basis of the maturities `t`, as a function of (lambd, data, alpha).
+
+    The maturity grid is fixed during a fit, so the basis is allocated once (with its constant column
+    of ones) and its two loading columns are overwritten in place for each candidate lambda, instead
+    of building a new (n, 3) array on every evaluation of the lambda search.
+    """
+    basis = np.empty((len(t), 3))
+    basis[:, 0] = 1
+    alpha_1 = basis[:, 1]
+    alpha_2 = basis[:, 2]
+
+    def concentrated_error(lambd, data, alpha=0.0):
+        u = t / lambd
+        e = np.exp(-u)
+        np.divide(1 - e, u, out=alpha_1)
+        np.subtract(alpha_1, e, out=alpha_2)
+        return _concentrated_error(basis, data, alpha, lambd)
+
+    return concentrated_error
+
+
+def _finite_points(maturities, yields):
+    """
+    Maturities and yields of the points of a curve where both are finite, so that a missing yield only drops
+    its own point from the fit. Zero maturities are moved to 1e-6 to avoid a division by zero.
+    """
+    maturities = np.asarray(maturities, dtype=float)
+    yields = np.asarray(yields, dtype=float)
+    finite = np.isfinite(maturities) & np.isfinite(yields)
+    t = np.where(maturities == 0, 1e-6, maturities)
+    return t[finite], yields[finite]
+
+
+def fit_nelson_siegel(maturities, yields, ridge=False, alpha=0.1, initial_params=None, lambda_bounds=(1e-4, 3),
+                      xatol=1e-5, maxiter=100):
     """
     Fit the Nelson-Siegel model to yield curve data.
 
+    The betas are solved in closed form for each candidate lambda, so only lambda is searched
+    numerically (bounded Brent).
+
     Parameters:
     - maturities: List or array of maturities (e.g., in years).
     - yields: List or array of corresponding yield values.
     - ridge: Whether to use ridge regularization.
     - alpha: Ridge regularization parameter.
-    - initial_params: Initial guess for the parameters [beta0, beta1, beta2, lambda].
+    - initial_params: Initial guess for the parameters [beta0, beta1, beta2, lambda]. Kept for
+      compatibility; the bounded lambda search does not need a starting point.
     - lambda_bounds: Tuple specifying the lower and upper bounds for lambda.
+    - xatol: Absolute tolerance on lambda for the Brent search.
+    - maxiter: Maximum number of objective evaluations of the Brent search.
+
+    Returns:
+    - Optimized parameters as a numpy array, all NaN if the curve has fewer finite points than parameters.
+    """
+    t, yields = _finite_points(maturities, yields)
+    if len(t) < 4:
+        return np.full(4, np.nan)
+    alpha = alpha if ridge else 0.0
+
+    result = minimize_scalar(
+        _make_concentrated_error(t),
+        bounds=lambda_bounds,
+        args=(yields, alpha),
+        method="bounded",
+        options={"xatol": xatol, "maxiter": maxiter},
+    )
+
+    lambd = result.x
+    betas = _solve_betas(_ns_basis(t, lambd), yields, alpha)
+
+    return np.append(betas, lambd)
+
+
+def _shared_maturities(maturities_list, yields_list):
+    """
+    Whether all curves share the same maturities and have finite yields, so that they can be stacked into a
+    single (n_curves, n) matrix and fitted against a common basis.
+    """
+    return (
+        len(maturities_list) > 0
+        and all(np.array_equal(maturities, maturities_list[0]) for maturities in maturities_list)
+        and np.isfinite(np.vstack(yields_list)).all()
+    )
+
+
+def _grid_search_lambda(t, yields_matrix, alpha=0.0, lambda_bounds=(1e-4, 3), n_grid=32):
+    """
+    Bracket around the best lambda on a coarse grid for each curve of `yields_matrix` (n_curves, n), where
+    all curves share the maturities `t`. Returns a (n_curves, 2) array of lambda bounds.
+
+    For a given lambda the basis is the same for every curve, so all curves are solved with a single
+    multi-right-hand-side least-squares call and their concentrated errors compared at once.
+    """
+    data = yields_matrix.T
+    grid = np.linspace(lambda_bounds[0], lambda_bounds[1], n_grid)
+    errors = np.empty((n_grid, data.shape[1]))
+
+    for k, lambd in enumerate(grid):
+        errors[k] = _concentrated_error(_ns_basis(t, lambd), data, alpha, lambd)
+
+    best = np.argmin(errors, axis=0)
+    return np.column_stack([grid[np.maximum(best - 1, 0)], grid[np.minimum(best + 1, n_grid - 1)]])
+
+
+# Positional wrapper, so that lambda bounds per curve can be mapped with `parallel_map`
+def _fit_within_bounds(maturities, yields, lambda_bounds, **kwargs):
+    return fit_nelson_siegel(maturities, yields, lambda_bounds=tuple(lambda_bounds), **kwargs)
+
+
+def fit_nelson_siegel_batch(maturities_list, yields_list, ridge=False, alpha=0.1, n_jobs=1):
+    """
+    Fit the Nelson-Siegel model to many yield curves (e.g. one per date).
+
+    Parameters:
+    - maturities_list: Sequence of maturity arrays, one per curve.
+    - yields_list: Sequence of yield arrays, one per curve.
+    - ridge: Whether to use ridge regularization.
+    - alpha: Ridge regularization parameter.
+    - n_jobs: Number of worker processes; 1 fits in the current process, -1 uses all cores.
 
     Returns:
-    - Optimized parameters as a numpy array.
-    """
-
-    if initial_params is None:
-        initial_params = [3, 0, 0, 1]
-
-
-    # Define bounds: (min, max) for each parameter
-    bounds = [
-        (-np.inf, np.inf),  # No bounds for beta0
-        (-np.inf, np.inf),  # No bounds for beta1
-        (-np.inf, np.inf),  # No bounds for beta2
-        (0, 3)       # Bounds for lambda
-    ]
-
-    if ridge:
-        result = minimize(
-            ridge_error_function,
-            initial_params,
-            args=(maturities, yields, alpha),
-            method="L-BFGS-B",
-            bounds = bounds,
-            options={"maxiter": 1000},
-        )
-    else:
-        result = minimize(
-            error_function,
-            initial_params,
-            args=(maturities, yields),
-            method="L-BFGS-B",
-            bounds = bounds,
-            options={"maxiter": 1000},
-        )
-
-    return result.x
\ No newline at end of file
+    - Optimized parameters as a numpy array of shape (n_curves, 4).
+
+    Notes:
+    - When all curves share the same maturities (e.g. the monthly grid of `apply_bootstrapper`), the best
+      lambda of each curve on a coarse grid is found for all curves at once, and each fit only refines
+      lambda between the grid points around it.
+    """
+    maturities_list = [np.asarray(maturities, dtype=float) for maturities in maturities_list]
+    yields_list = [np.asarray(yields, dtype=float) for yields in yields_list]
+    desc = "Fitting Nelson-Siegel"
+
+    if _shared_maturities(maturities_list, yields_list):
+        t = np.where(maturities_list[0] == 0, 1e-6, maturities_list[0])
+        lambda_bounds_list = _grid_search_lambda(t, np.vstack(yields_list), alpha if ridge else 0.0)
+
+        fit = partial(_fit_within_bounds, ridge=ridge, alpha=alpha)
+        params = parallel_map(fit, maturities_list, yields_list, lambda_bounds_list, n_jobs=n_jobs, desc=desc)
+        return np.array(params).reshape(-1, 4)
+
+    fit = partial(fit_nelson_siegel, ridge=ridge, alpha=alpha)
+    params = parallel_map(fit, maturities_list, yields_list, n_jobs=n_jobs, desc=desc)
+
+    return np.array(params).reshape(-1, 4)
@@ -1,80 +1,298 @@
 import numpy as np
-from scipy.optimize import minimize
+from functools import partial
+from itertools import combinations
+from scipy.optimize import least_squares
+from tqdm import tqdm
+from Models.Nelson_Siegel import _concentrated_error, _finite_points, _shared_maturities, _solve_betas
+from Utils.parallel import parallel_map
 
 
 def nelson_siegel_svensson(params, maturities):
 
     beta0, beta1, beta2, beta3, lambd1, lambd2 = params
 
-    # Safeguard lambdas to prevent division by zero
-    lambd1 = max(lambd1, 1e-4)
-    lambd2 = max(lambd2, 1e-4)
+    # Vectorized over maturities; at t = 0 the (1 - e)/u terms take their limit value 1
+    t = np.asarray(maturities, dtype=float)
 
-    # Safeguard maturities to avoid division by zero
-    t = np.where(maturities == 0, 1e-6, maturities)
+    u1 = t / lambd1
+    e1 = np.exp(-u1)
+    alpha_1 = np.divide(1 - e1, u1, out=np.ones_like(u1), where=u1 != 0)
+    alpha_2 = alpha_1 - e1
 
-    alpha_1 = (1 - np.exp(-t / lambd1)) / (t / lambd1)
-    alpha_2 = alpha_1 - np.exp(-t / lambd1)
-    alpha_3 = (1 - np.exp(-t / lambd2)) / (t / lambd2) - np.exp(-t / lambd2)
+    u2 = t / lambd2
+    e2 = np.exp(-u2)
+    alpha_3 = np.divide(1 - e2, u2, out=np.ones_like(u2), where=u2 != 0) - e2
 
     return beta0 + beta1 * alpha_1 + beta2 * alpha_2 + beta3 * alpha_3
 
 
 def error_function(params, maturities, data):
-    data_hat = nelson_siegel_svensson(params, maturities)
-    return np.sum((data - data_hat) ** 2)
+    residuals = data - nelson_siegel_svensson(params, maturities)
+    return residuals @ residuals
 
 
 def ridge_error_function(params, maturities, data, alpha=0.1):
-    data_hat = nelson_siegel_svensson(params, maturities)
-    error = np.sum((data - data_hat) ** 2)
-    regularization = alpha * sum(param**2 for param in params)
+    residuals = data - nelson_siegel_svensson(params, maturities)
+    error = residuals @ residuals
+    regularization = alpha * np.dot(params, params)
     return error + regularization
 
 
-def fit_nelson_siegel_svensson(maturities, yields, ridge=False, alpha=0.1, initial_params=None):
+# Largest condition number of a fitted NSS basis whose betas are returned; above it (e.g. nearly equal
+# lambdas, or maturities too short to tell the loadings apart) the betas are large offsetting values
+_MAX_BASIS_COND = 1e4
+
+
+# Nelson-Siegel-Svensson factor loadings [1, alpha_1, alpha_2, alpha_3], shape (n, 4),
+# with the scaled maturities u = t/lambda and the exponentials e = exp(-u) of both lambdas
+def _nss_loadings(t, lambd1, lambd2):
+    u1 = t / lambd1
+    e1 = np.exp(-u1)
+    alpha_1 = (1 - e1) / u1
+    alpha_2 = alpha_1 - e1
+
+    u2 = t / lambd2
+    e2 = np.exp(-u2)
+    alpha_3 = (1 - e2) / u2 - e2
+
+    basis = np.column_stack([np.ones_like(t), alpha_1, alpha_2, alpha_3])
+    return basis, u1, e1, u2, e2
+
+
+def _nss_basis(t, lambd1, lambd2):
+    return _nss_loadings(t, lambd1, lambd2)[0]
+
+
+def _make_residuals_and_jacobian(t, data, alpha=0.0):
+    """
+    Residuals of the fit concentrated on (lambda1, lambda2), including the ridge terms (their squared norm
+    is `_concentrated_error` of the NSS basis), and their Jacobian, as two functions of the lambdas for fixed
+    `t` and `data`.
+
+    The Jacobian uses Kaufman's variable projection approximation -(I - P) dPhi/dlambda betas, where P
+    projects onto the (ridge-augmented) basis, with the closed-form loading derivatives
+    d alpha_1/d lambda = alpha_2/lambda and d alpha_2/d lambda = (alpha_2 - u*e)/lambda, u = t/lambda.
+
+    The solver evaluates the Jacobian at the point whose residuals it has just computed, so the basis, its
+    exponentials and the betas of the last point are kept and shared by both functions.
+    """
+    last = {}
+
+    def project(lambdas):
+        key = tuple(lambdas)
+        if last.get("lambdas") != key:
+            basis, u1, e1, u2, e2 = _nss_loadings(t, *key)
+            last.update(lambdas=key, basis=basis, betas=_solve_betas(basis, data, alpha), u1=u1, u2=u2, e1=e1, e2=e2)
+        return last
+
+    def residuals(lambdas):
+        fit = project(lambdas)
+        basis, betas = fit["basis"], fit["betas"]
+        residuals = data - basis @ betas
+        if alpha > 0:
+            residuals = np.concatenate([residuals, -np.sqrt(alpha) * betas, np.sqrt(alpha) * np.asarray(lambdas)])
+        return residuals
+
+    def jacobian(lambdas):
+        fit = project(lambdas)
+        basis, betas = fit["basis"], fit["betas"]
+        lambd1, lambd2 = fit["lambdas"]
+
+        d_fit = [
+            (betas[1] * basis[:, 2] + betas[2] * (basis[:, 2] - fit["u1"] * fit["e1"])) / lambd1,
+            betas[3] * (basis[:, 3] - fit["u2"] * fit["e2"]) / lambd2,
+        ]
+
+        columns = []
+        for d_fit_k in d_fit:
+            coefficients = _solve_betas(basis, d_fit_k, alpha)
+            column = basis @ coefficients - d_fit_k
+            if alpha > 0:
+                column = np.concatenate([column, np.sqrt(alpha) * coefficients, np.zeros(2)])
+            columns.append(column)
+        jacobian = np.column_stack(columns)
+
+        if alpha > 0:
+            jacobian[-2:] += np.sqrt(alpha) * np.eye(2)
+        return jacobian
+
+    return residuals, jacobian
+
+
+def _separate_lambdas(residuals, jacobian, upper, min_gap):
+    """
+    `residuals` and `jacobian` (functions of the lambdas) reparametrized as functions of x = (lambda1, s), with
+    lambda2 = lambda1 + min_gap + s * (upper - min_gap - lambda1) and s in [0, 1], so that box bounds on x keep
+    lambda1 + min_gap <= lambda2 <= upper. Also returns the map from x to the lambdas.
+
+    As lambda2 approaches lambda1 the two curvature loadings become collinear, and the betas solved for them
+    grow into large offsetting values, so the lambdas are kept apart by at least `min_gap`.
+    """
+    def to_lambdas(x):
+        lambd1, s = x
+        return np.array([lambd1, lambd1 + min_gap + s * (upper - min_gap - lambd1)])
+
+    def separated_residuals(x):
+        return residuals(to_lambdas(x))
+
+    def separated_jacobian(x):
+        lambd1, s = x
+        jac = jacobian(to_lambdas(x))
+        return np.column_stack([jac[:, 0] + (1 - s) * jac[:, 1], (upper - min_gap - lambd1) * jac[:, 1]])
+
+    return separated_residuals, separated_jacobian, to_lambdas
+
+
+def fit_nelson_siegel_svensson(maturities, yields, ridge=False, alpha=0.1, initial_params=None,
+                               lambda_bounds=(0.5, 3), min_lambda_gap=0.5, ftol=1e-9, gtol=1e-7, maxiter=100):
     """
     Fit the Nelson-Siegel-Svensson model to yield curve data.
 
+    The betas are solved in closed form for each candidate (lambda1, lambda2), so only the two
+    lambdas are searched numerically, with a bounded trust-region least-squares solver and an
+    analytic Jacobian. The lambdas are kept ordered and apart, lambda1 + min_lambda_gap <= lambda2, since
+    the model is not identified when they coincide.
+
     Parameters:
     - maturities: List or array of maturities (e.g., in years).
     - yields: List or array of corresponding yield values.
     - ridge: Whether to use ridge regularization.
     - alpha: Ridge regularization parameter.
     - initial_params: Initial guess for the parameters [beta0, beta1, beta2, beta3, lambda1, lambda2].
+      Only the lambdas are used as the starting point of the search, sorted and clipped to the feasible range.
     - lambda_bounds: Tuple specifying the lower and upper bounds for lambda1 and lambda2.
+    - min_lambda_gap: Minimum distance between lambda1 and lambda2.
+    - ftol: Tolerance on the relative change of the sum of squares for termination.
+    - gtol: Tolerance on the (scaled) gradient norm for termination.
+    - maxiter: Maximum number of residual evaluations.
 
     Returns:
-    - Optimized parameters as a numpy array.
+    - Optimized parameters as a numpy array, all NaN if the curve has fewer finite points than parameters or
+      its fitted basis is too ill-conditioned for the betas to be meaningful.
     """
+    lower, upper = lambda_bounds
+    if upper - lower < min_lambda_gap:
+        raise ValueError("lambda_bounds must be at least min_lambda_gap apart")
+
+    t, yields = _finite_points(maturities, yields)
+    if len(t) < 6:
+        return np.full(6, np.nan)
+
     if initial_params is None:
-        initial_params = [3, 0, 0, 0, 1, 1]
-    lambda_bounds = (0.5, 3)
-    bounds = [
-        (-np.inf, np.inf),  # No bounds for beta0
-        (-np.inf, np.inf),  # No bounds for beta1
-        (-np.inf, np.inf),  # No bounds for beta2
-        (-np.inf, np.inf),  # No bounds for beta3
-        lambda_bounds,      # Bounds for lambda1
-        lambda_bounds       # Bounds for lambda2
-    ]
-    if ridge:
-        result = minimize(
-            ridge_error_function,
-            initial_params,
-            args=(maturities, yields, alpha),
-            method="L-BFGS-B",
-            bounds=bounds,
-            options={"maxiter": 1000},
-        )
+        initial_lambdas = [1.0, 2.0]
     else:
-        result = minimize(
-            error_function,
-            initial_params,
-            args=(maturities, yields),
-            method="L-BFGS-B",
-            bounds=bounds,
-            options={"maxiter": 1000},
-        )
-
-    return result.x
\ No newline at end of file
+        initial_lambdas = np.sort(initial_params[4:])
+
+    # Starting point (lambda1, s) of the separated search, within its bounds
+    lambd1 = np.clip(initial_lambdas[0], lower, upper - min_lambda_gap)
+    lambd2 = np.clip(initial_lambdas[1], lambd1 + min_lambda_gap, upper)
+    span = upper - min_lambda_gap - lambd1
+    initial_x = [lambd1, np.clip((lambd2 - lambd1 - min_lambda_gap) / span, 0.0, 1.0) if span > 0 else 0.0]
+
+    alpha = alpha if ridge else 0.0
+
+    residuals, jacobian, to_lambdas = _separate_lambdas(*_make_residuals_and_jacobian(t, yields, alpha),
+                                                        upper, min_lambda_gap)
+    result = least_squares(
+        residuals,
+        initial_x,
+        jac=jacobian,
+        bounds=([lower, 0.0], [upper - min_lambda_gap, 1.0]),
+        method="trf",
+        ftol=ftol,
+        gtol=gtol,
+        max_nfev=maxiter,
+    )
+
+    lambdas = to_lambdas(result.x)
+    basis = _nss_basis(t, lambdas[0], lambdas[1])
+    if np.linalg.cond(basis) > _MAX_BASIS_COND:
+        return np.full(6, np.nan)
+    betas = _solve_betas(basis, yields, alpha)
+
+    return np.concatenate([betas, lambdas])
+
+
+def _grid_search_lambdas(t, yields_matrix, alpha=0.0, lambda_bounds=(0.5, 3), min_lambda_gap=0.5, n_grid=8):
+    """
+    Best (lambda1, lambda2) on a coarse grid for each curve of `yields_matrix` (n_curves, n), where all
+    curves share the maturities `t`. Only the pairs the fit can reach are scored, lambda1 + min_lambda_gap
+    <= lambda2: the diagonal, where the basis is rank-deficient, and the reversed pairs are skipped.
+
+    For a given pair of lambdas the basis is the same for every curve, so all curves are solved with a
+    single multi-right-hand-side least-squares call and their concentrated errors compared at once.
+    """
+    data = yields_matrix.T
+    grid = np.linspace(lambda_bounds[0], lambda_bounds[1], n_grid)
+    best_errors = np.full(data.shape[1], np.inf)
+    best_lambdas = np.empty((data.shape[1], 2))
+
+    for lambd1, lambd2 in combinations(grid, 2):
+        if lambd2 - lambd1 < min_lambda_gap:
+            continue
+        errors = _concentrated_error(_nss_basis(t, lambd1, lambd2), data, alpha, (lambd1, lambd2))
+
+        improved = errors < best_errors
+        best_errors[improved] = errors[improved]
+        best_lambdas[improved] = lambd1, lambd2
+
+    return best_lambdas
+
+
+# Positional wrapper, so that a starting point per curve can be mapped with `parallel_map`
+def _fit_from_initial_params(maturities, yields, initial_params, **kwargs):
+    return fit_nelson_siegel_svensson(maturities, yields, initial_params=initial_params, **kwargs)
+
+
+def fit_nelson_siegel_svensson_batch(maturities_list, yields_list, ridge=False, alpha=0.1, n_jobs=1):
+    """
+    Fit the Nelson-Siegel-Svensson model to many yield curves (e.g. one per date).
+
+    Parameters:
+    - maturities_list: Sequence of maturity arrays, one per curve.
+    - yields_list: Sequence of yield arrays, one per curve.
+    - ridge: Whether to use ridge regularization.
+    - alpha: Ridge regularization parameter.
+    - n_jobs: Number of worker processes; 1 fits in the current process, -1 uses all cores.
+
+    Returns:
+    - Optimized parameters as a numpy array of shape (n_curves, 6).
+
+    Notes:
+    - When all curves share the same maturities (e.g. the monthly grid of `apply_bootstrapper`), each
+      fit starts from its best (lambda1, lambda2) on a coarse grid, evaluated for all curves at once.
+    - Otherwise, fits in the current process (n_jobs=1) are warm-started from the previous curve's
+      lambdas, which are usually close for adjacent dates, and parallel fits start from the default guess.
+      A fit that failed (an all-NaN row, see `fit_nelson_siegel_svensson`) is not used as a starting
+      point; the next curve starts from the default guess instead.
+    """
+    maturities_list = [np.asarray(maturities, dtype=float) for maturities in maturities_list]
+    yields_list = [np.asarray(yields, dtype=float) for yields in yields_list]
+    desc = "Fitting Nelson-Siegel-Svensson"
+
+    if _shared_maturities(maturities_list, yields_list):
+        t = np.where(maturities_list[0] == 0, 1e-6, maturities_list[0])
+        initial_lambdas = _grid_search_lambdas(t, np.vstack(yields_list), alpha if ridge else 0.0)
+        initial_params_list = [np.concatenate([np.zeros(4), lambdas]) for lambdas in initial_lambdas]
+
+        fit = partial(_fit_from_initial_params, ridge=ridge, alpha=alpha)
+        params = parallel_map(fit, maturities_list, yields_list, initial_params_list, n_jobs=n_jobs, desc=desc)
+        return np.array(params).reshape(-1, 6)
+
+    if n_jobs != 1:
+        fit = partial(fit_nelson_siegel_svensson, ridge=ridge, alpha=alpha)
+        params = parallel_map(fit, maturities_list, yields_list, n_jobs=n_jobs, desc=desc)
+        return np.array(params).reshape(-1, 6)
+
+    params = []
+    initial_params = None
+    for maturities, yields in tqdm(zip(maturities_list, yields_list), total=len(maturities_list), desc=desc):
+        result = fit_nelson_siegel_svensson(maturities, yields, ridge=ridge, alpha=alpha,
+                                            initial_params=initial_params)
+        params.append(result)
+
+        # Fall back to the default guess if the previous fit failed (too few finite points or an
+        # ill-conditioned basis, returned as NaN)
+        initial_params = result if np.all(np.isfinite(result)) else None
+
+    return np.array(params).reshape(-1, 6)
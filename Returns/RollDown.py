@@ -1,9 +1,19 @@
 import QuantLib as ql
+from functools import lru_cache
 from Utils.conversions import pydatetime_to_quantlib_date
 import SpotCurve.Spot_Curve_Calculator as scc
-from tqdm import tqdm
 import numpy as np
+import pandas as pd
 from Utils.data_processing import get_most_liquid_bond_by_interval
+from Utils.parallel import parallel_map
+
+# Bond conventions, shared by every bond priced in this module
+_CALENDAR = ql.UnitedStates(m=ql.UnitedStates.GovernmentBond)
+_DAY_COUNT = ql.ActualActual(ql.ActualActual.ISDA)
+_TENOR = ql.Period(ql.Semiannual)
+_BUSINESS_CONVENTION = ql.Unadjusted
+_DATE_GENERATION = ql.DateGeneration.Backward
+_SETTLEMENT_DAYS = 1
 
 def price_bond(spot_curve_handle, coupon, issue_date, maturity_date, current_date):
     """
@@ -34,7 +44,7 @@ def price_bond(spot_curve_handle, coupon, issue_date, maturity_date, current_dat
         - Day count convention: Actual/Actual (ISDA).
         - Calendar: United States Government Bond market.
     3. Uses QuantLib's `DiscountingBondEngine` to price the bond based on the provided
-       spot curve handle.
+       spot curve handle (see `price_bond_at`).
     4. Returns the computed clean price of the bond.
 
     Notes:
@@ -44,43 +54,195 @@ def price_bond(spot_curve_handle, coupon, issue_date, maturity_date, current_dat
     - The spot curve must be a valid QuantLib `YieldTermStructureHandle`. If invalid,
       the function will raise an exception.
     """
+    fixed_rate_bond = _get_bond(coupon, issue_date, maturity_date)
+
+    return price_bond_at(fixed_rate_bond, spot_curve_handle, current_date)
+
+def price_bond_at(bond, spot_curve_handle, eval_date):
+    """
+    Computes the clean price of a pre-built QuantLib bond on a given evaluation date.
+
+    Parameters:
+    ----------
+    bond : QuantLib.Bond
+        The bond to price, e.g. as returned by `_get_bond`. It can be reused across
+        curves and evaluation dates.
+    spot_curve_handle : QuantLib.YieldTermStructureHandle
+        A handle to the spot yield curve used for discounting.
+    eval_date : datetime or string
+        The evaluation date, in a format convertible to QuantLib's date format. It is
+        adjusted to a business day of the U.S. Government Bond calendar.
+
+    Returns:
+    -------
+    float
+        The clean price of the bond.
+
+    Notes:
+    ------
+    - The evaluation date is only changed for the duration of the call (`ql.SavedSettings`),
+      so pricing the same bond on several dates does not leak global QuantLib state.
+    """
+    eval_date = _CALENDAR.adjust(pydatetime_to_quantlib_date(eval_date))
+
+    with ql.SavedSettings():
+        ql.Settings.instance().evaluationDate = eval_date
+        bond.setPricingEngine(ql.DiscountingBondEngine(spot_curve_handle))
+        return bond.cleanPrice()
+
+@lru_cache(maxsize=None)
+def _get_bond(coupon, issue_date, maturity_date):
+    """
+    Returns the QuantLib fixed-rate bond used for pricing: semi-annual coupons, face value of 100,
+    Actual/Actual (ISDA) day count and United States Government Bond calendar.
+
+    The schedule and bond only depend on the bond's terms, so they are built once per
+    (coupon, issue_date, maturity_date) and reused for every date the bond is priced on.
+    """
     # Bond params
-    calendar = ql.UnitedStates(m=ql.UnitedStates.GovernmentBond)
-    current_date = calendar.adjust(pydatetime_to_quantlib_date(current_date))
-    ql.Settings.instance().evaluationDate = current_date
-    day_count = ql.ActualActual(ql.ActualActual.ISDA)
     issue_date = pydatetime_to_quantlib_date(issue_date)
     maturity_date = pydatetime_to_quantlib_date(maturity_date)
-    tenor = ql.Period(ql.Semiannual)
-    business_convention = ql.Unadjusted
-    date_generation = ql.DateGeneration.Backward
     month_end = False
 
     schedule = ql.Schedule(issue_date,
                            maturity_date,
-                           tenor,
-                           calendar,
-                           business_convention,
-                           business_convention,
-                           date_generation,
+                           _TENOR,
+                           _CALENDAR,
+                           _BUSINESS_CONVENTION,
+                           _BUSINESS_CONVENTION,
+                           _DATE_GENERATION,
                            month_end)
 
     coupon_rate = [coupon/100]
-    settlement_days = 1
     face_value = 100
 
-    fixed_rate_bond = ql.FixedRateBond(settlement_days,
+    fixed_rate_bond = ql.FixedRateBond(_SETTLEMENT_DAYS,
                                        face_value,
                                        schedule,
                                        coupon_rate,
-                                       day_count)
+                                       _DAY_COUNT)
+
+    return fixed_rate_bond
+
+@lru_cache(maxsize=None)
+def _get_cashflows(coupon, issue_date, maturity_date):
+    """
+    Returns the bond, its cash flow dates (as QuantLib serial numbers) and its cash flow amounts,
+    building and caching them the first time the bond is seen.
+    """
+    bond = _get_bond(coupon, issue_date, maturity_date)
+    cashflows = bond.cashflows()
+    serials = np.array([cf.date().serialNumber() for cf in cashflows])
+    amounts = np.array([cf.amount() for cf in cashflows])
+
+    return bond, serials, amounts
+
+def _settlement_date(current_date):
+    """T+1 settlement date of a trade on `current_date`, as used by `_get_bond`."""
+    current_date = _CALENDAR.adjust(pydatetime_to_quantlib_date(current_date))
+    return _CALENDAR.advance(current_date, _SETTLEMENT_DAYS, ql.Days)
+
+def _discount_grid(yieldcurve, serials):
+    """
+    Discount factors of `yieldcurve` on the unique dates of `serials` (QuantLib serial numbers),
+    returned as the sorted (dates, discount factors) pair read by `_price_from_cashflows`.
+    """
+    dates = np.unique(serials)
+    discounts = np.fromiter((yieldcurve.discount(ql.Date(int(serial))) for serial in dates),
+                            dtype=np.float64, count=len(dates))
+
+    return dates, discounts
+
+def _price_from_cashflows(discount_grid, cashflows, settlement):
+    """
+    Clean price of a bond from its cached cash flows, equal to the `DiscountingBondEngine` clean price:
+    the cash flows paid after settlement are discounted on the curve, forwarded to the settlement
+    date and the accrued amount is subtracted.
 
-    bond_engine = ql.DiscountingBondEngine(spot_curve_handle)
-    fixed_rate_bond.setPricingEngine(bond_engine)
+    The discount factors are looked up in `discount_grid` (see `_discount_grid`), which must contain
+    the settlement date and every cash flow date after it; the lookup is exact on those dates.
+    """
+    dates, discounts = discount_grid
+    bond, serials, amounts = cashflows
+    remaining = serials > settlement.serialNumber()
+    dirty_price = (amounts[remaining] @ np.interp(serials[remaining], dates, discounts)
+                   / np.interp(settlement.serialNumber(), dates, discounts))
+
+    return float(dirty_price - bond.accruedAmount(settlement))
 
-    return fixed_rate_bond.cleanPrice()
+def _compute_rolldown_on_date(curve_set_df, bonds, past_date, current_date):
+    """
+    Computes the roll-down between `past_date` and `current_date` for the bonds in `bonds`
+    (indexed by bond identifier, with 'coupon', 'issue_date' and 'maturity_date' columns), using
+    the spot curve bootstrapped from `curve_set_df`, the bonds available on `past_date`.
 
-def compute_rolldown(df):
+    Returns a pandas.Series of roll-downs indexed like `bonds`. It only depends on its arguments,
+    so it can run in a worker process.
+    """
+    spot_rates_calculator = scc.SpotRatesCalculator()
+
+    # 1) Pick your "most liquid" subset or single bond for bootstrapping
+    otr = get_most_liquid_bond_by_interval(curve_set_df)
+
+    # 2) Bootstrap a yield curve (with rolldown=True so it returns the raw curve)
+    yc = spot_rates_calculator.curve_bootstrapper(otr, past_date, rolldown=True)
+
+    # 3) Enable extrapolation so we don't get "past max curve time" errors
+    yc.enableExtrapolation()
+
+    # 4) Settlement dates for both evaluation dates, shared by all bonds
+    settlement_t1 = _settlement_date(past_date)
+    settlement_t = _settlement_date(current_date)
+
+    # 5) Preflight: only bonds with all their terms, maturing after their issue, can be priced; the others
+    #    stay NaN without reaching QuantLib (a failed cash-flow build is not cached, so it would be retried
+    #    on every date)
+    rolldowns = np.full(len(bonds), np.nan)
+    valid = (bonds[['coupon', 'issue_date', 'maturity_date']].notna().all(axis=1)
+             & (bonds['maturity_date'] > bonds['issue_date'])).to_numpy()
+
+    # 6) Cached cash flows of each valid bond at 'current_date'; only bonds paying a cash flow
+    #    after the earlier settlement date have a (non-zero) price on both dates
+    bond_info = zip(bonds['coupon'].to_numpy()[valid].tolist(),
+                    bonds['issue_date'][valid].tolist(),
+                    bonds['maturity_date'][valid].tolist())
+    priced = []
+    bond_cashflows = []
+
+    for k, (coupon, issue_date, maturity_date) in zip(np.flatnonzero(valid), bond_info):
+        try:
+            cashflows = _get_cashflows(coupon, issue_date, maturity_date)
+        except RuntimeError:
+            # QuantLib rejects the bond's terms: leave it as NaN
+            continue
+
+        if len(cashflows[1]) and cashflows[1][-1] > settlement_t1.serialNumber():
+            priced.append(k)
+            bond_cashflows.append(cashflows)
+
+    if not priced:
+        return pd.Series(rolldowns, index=bonds.index)
+
+    # 7) Query the curve once per date needed by any bond (both settlement dates and all the cash
+    #    flows paid after the earlier one) instead of once per bond cash flow
+    settlement_serials = [settlement_t1.serialNumber(), settlement_t.serialNumber()]
+    cashflow_serials = np.concatenate([cashflows[1] for cashflows in bond_cashflows])
+    try:
+        discount_grid = _discount_grid(
+            yc, np.concatenate([settlement_serials, cashflow_serials[cashflow_serials > min(settlement_serials)]])
+        )
+    except RuntimeError:
+        # The curve cannot be evaluated (e.g. still beyond max curve): store NaN so you can inspect later
+        return pd.Series(rolldowns, index=bonds.index)
+
+    # 8) Price at t-1 and at t, both on the past_date curve, and compute the roll-downs
+    price_t1 = np.array([_price_from_cashflows(discount_grid, cashflows, settlement_t1) for cashflows in bond_cashflows])
+    price_t = np.array([_price_from_cashflows(discount_grid, cashflows, settlement_t) for cashflows in bond_cashflows])
+    rolldowns[priced] = (price_t / price_t1) - 1
+
+    return pd.Series(rolldowns, index=bonds.index)
+
+def compute_rolldown(df, n_jobs=1):
     """
     Computes the roll-down for bonds in a given DataFrame based on their prices and a
     bootstrapped yield curve.
@@ -95,6 +257,9 @@ def compute_rolldown(df):
         - The first index level corresponds to the dates.
         - The second index level corresponds to bond identifiers.
         - Columns include 'coupon', 'issue_date', 'maturity_date', and 'price', among others.
+    n_jobs : int, optional
+        Number of worker processes used to process the dates in parallel. 1 runs in the
+        current process and -1 uses all available cores. Default is 1.
 
     Returns:
     -------
@@ -105,88 +270,49 @@ def compute_rolldown(df):
 
     Methodology:
     -----------
-    1. Iterates over each unique date in the DataFrame.
-    2. Bootstraps a spot yield curve for the bonds available on that date.
-    3. Advances to the next day and calculates the roll-down for each bond using:
+    1. Iterates over each pair of consecutive unique dates in the DataFrame.
+    2. Bootstraps a spot yield curve for the bonds available on the earlier date.
+    3. Advances to the next date and calculates the roll-down for each bond using:
         roll_down = (price_t / price_t1) - 1
         where:
         - `price_t1` is the bond price on the previous date.
         - `price_t` is the bond price on the current date derived using the spot curve.
-    4. Handles potential errors gracefully (e.g., missing data or pricing errors).
+    4. Bonds that cannot be priced (missing terms, or no cash flow left after the earlier
+       date's settlement) are filtered out beforehand and left as NaN.
 
     Notes:
     ------
     - The `spot_rates_calculator.curve_bootstrapper` function is used to construct the
-      spot yield curve, and `price_bond` is used to compute bond prices from the curve.
+      spot yield curve. Bond prices are computed from each bond's cached cash flows
+      (`_price_from_cashflows`), which gives the same clean price as `price_bond` without
+      rebuilding the QuantLib bond on every date. The curve is queried once per distinct
+      cash flow date of each pair of dates (`_discount_grid`), not once per bond cash flow.
     - The function assumes that the DataFrame is sorted by date in the index.
+    - Each pair of dates is independent of the others, so with n_jobs != 1 they are spread
+      across worker processes; each worker only receives the two date slices it needs.
     """
-    # Create a 'rolldown' column initialized with NaN
-    df.loc[:, 'rolldown'] = np.nan
-
-    # Instantiate your SpotRatesCalculator (custom class)
-    spot_rates_calculator = scc.SpotRatesCalculator()
-
     # Unique dates in ascending order
     unique_dates = df.index.get_level_values(0).unique()
 
-    for i, past_date in enumerate(tqdm(unique_dates, desc="Computing RollDown")):
-        # 1) Get bond data for the 'past_date'
-        curve_set_df = df.loc[past_date]
-
-        # 2) Pick your "most liquid" subset or single bond for bootstrapping
-        otr = get_most_liquid_bond_by_interval(curve_set_df)
-
-        # 3) Bootstrap a yield curve (with rolldown=True so it returns the raw curve)
-        yc = spot_rates_calculator.curve_bootstrapper(otr, past_date, rolldown=True)
-
-        # 4) Enable extrapolation so we don't get "past max curve time" errors
-        yc.enableExtrapolation()
-
-        # 5) Create a YieldTermStructureHandle from the curve
-        spot_curve_handle = ql.YieldTermStructureHandle(yc)
-
-        # 6) Identify the "current_date" (the next date in the DataFrame)
-        if i + 1 < len(unique_dates):
-            current_date = unique_dates[i + 1]
-        else:
-            # No next date, so we can't compute a roll-down
-            break
-
-        # 7) For each bond at 'current_date', compute roll-down
-        for bond_id in df.loc[current_date].index:
-            try:
-                # Retrieve bond info
-                coupon = df.loc[(current_date, bond_id), 'coupon']
-                issue_date = df.loc[(current_date, bond_id), 'issue_date']
-                maturity_date = df.loc[(current_date, bond_id), 'maturity_date']
-
-                # Price at t-1 (using the past_date curve)
-                price_t1 = price_bond(
-                    spot_curve_handle,
-                    coupon,
-                    issue_date,
-                    maturity_date,
-                    past_date
-                )
-
-                # Price at t (using the same curve, but with current_date as evaluation)
-                price_t = price_bond(
-                    spot_curve_handle,
-                    coupon,
-                    issue_date,
-                    maturity_date,
-                    current_date
-                )
-
-                # Compute roll-down
-                roll_down = (price_t / price_t1) - 1
-
-            except (KeyError, IndexError, ValueError, ZeroDivisionError, RuntimeError) as e:
-                # If something goes wrong (e.g., missing data or still beyond max curve),
-                # store NaN so you can inspect later.
-                roll_down = np.nan
-
-            # 8) Store result
-            df.at[(current_date, bond_id), 'rolldown'] = roll_down
-
-    return df
\ No newline at end of file
+    # Each date is paired with the next one ("current_date"); the last date has no next date,
+    # so no roll-down (and no curve) is computed for it
+    past_dates = unique_dates[:-1]
+    current_dates = unique_dates[1:]
+
+    # Bond data for each 'past_date' (to bootstrap the curve) and each 'current_date' (to price),
+    # split by date in a single pass
+    bonds_by_date = {date: bonds_df.droplevel(0) for date, bonds_df in df.groupby(level=0, sort=False)}
+    curve_sets = [bonds_by_date[past_date] for past_date in past_dates]
+    bonds = [bonds_by_date[current_date][['coupon', 'issue_date', 'maturity_date']] for current_date in current_dates]
+
+    rolldown_results = parallel_map(_compute_rolldown_on_date, curve_sets, bonds, past_dates, current_dates,
+                                    n_jobs=n_jobs, desc="Computing RollDown")
+
+    # Store the results for all dates at once; bonds without a roll-down are NaN
+    if rolldown_results:
+        rolldown = pd.concat(rolldown_results, keys=current_dates)
+        df.loc[:, 'rolldown'] = rolldown.reindex(df.index).to_numpy()
+    else:
+        df.loc[:, 'rolldown'] = np.nan
+
+    return df
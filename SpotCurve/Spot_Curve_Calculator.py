@@ -1,11 +1,49 @@
 import QuantLib as ql
+import numpy as np
 import pandas as pd
-from tqdm import tqdm
+from functools import lru_cache, partial
 from Utils.conversions import *
 from Utils.data_processing import *
 from Utils.get_spot_rates import *
 from Models.Nelson_Siegel import *
 from Models.Nelson_Siegel_Svensonn import *
+from Utils.parallel import parallel_map
+
+
+# Maturity grids (in years) of the interpolated curves, by interpolation frequency
+_MATURITIES_BY_FREQ = {
+    'monthly': np.linspace(0, 30, 361),
+    'daily': np.linspace(0, 30, 361 * 30),
+    'quarterly': np.linspace(0, 30, 121),
+}
+
+
+# Bootstrap bond conventions; the QuantLib objects are built once and shared by every date
+_SETTLEMENT_DAYS = 1
+_SETTLEMENT_PERIOD = ql.Period(_SETTLEMENT_DAYS, ql.Days)
+_COUPON_TENOR = ql.Period(ql.Semiannual)
+_DAY_COUNT = ql.ActualActual(ql.ActualActual.ISDA)
+
+
+@lru_cache(maxsize=4096)
+def _make_schedule(settlement_serial, maturity_serial, calendar):
+    """
+    Semi-annual coupon schedule from settlement to maturity (given as QuantLib serial numbers) used by the
+    bootstrap bond helpers.
+
+    The same (settlement, maturity) pair reappears on many dates as bonds roll, so schedules are built once
+    and reused. QuantLib calendars compare and hash by name, so each calendar has its own cache entries.
+    """
+    return ql.Schedule(
+        ql.Date(settlement_serial),
+        ql.Date(maturity_serial),
+        _COUPON_TENOR,
+        calendar,
+        ql.ModifiedFollowing,
+        ql.ModifiedFollowing,
+        ql.DateGeneration.Backward,
+        False,
+    )
 
 
 class SpotRatesCalculator:
@@ -42,6 +80,8 @@ class SpotRatesCalculator:
     """
     def __init__(self):
         self.calendar = ql.UnitedStates(ql.UnitedStates.GovernmentBond)
+        # Price quotes of the bootstrap helpers, by bond identifier, reused across dates
+        self._quote_pool = {}
 
     def curve_bootstrapper(self, curve_set_df, current_date, freq = 'monthly', rolldown = False):
         """
@@ -65,42 +105,50 @@ class SpotRatesCalculator:
 
         Notes:
             - Bonds are filtered to avoid duplicate maturities.
+            - Unless rolldown=True, each bond's price quote is kept (by the index of `curve_set_df`) and
+              updated on the next call, instead of being created again for every date.
             - The QuantLib `PiecewiseCubicZero` method is used to construct the yield curve.
         """
         current_date = self.calendar.adjust(pydatetime_to_quantlib_date(current_date))
         ql.Settings.instance().evaluationDate = current_date
 
-        t_plus = 1
-        bond_settlement_date = self.calendar.advance(current_date, ql.Period(t_plus, ql.Days))
-        frequency = ql.Semiannual
-        day_count = ql.ActualActual(ql.ActualActual.ISDA)
+        settlement_serial = self.calendar.advance(current_date, _SETTLEMENT_PERIOD).serialNumber()
+        day_count = _DAY_COUNT
         par = 100.0
 
+        # Maturities as QuantLib serial numbers, converted for all bonds at once; keep the first bond of
+        # each maturity, in their original order
+        maturity_serials, first_bonds = np.unique(datetimes_to_quantlib_serials(curve_set_df["maturity_date"]),
+                                                  return_index=True)
+        order = np.argsort(first_bonds)
+        bonds = curve_set_df.iloc[first_bonds[order]]
+
+        # Reuse each bond's quote from previous dates, unless the curve is returned to the caller (a later
+        # call would then move its quotes) or the bonds cannot be told apart by their index
+        use_quote_pool = not rolldown and bonds.index.is_unique
+
         bond_helpers = []
-        seen_maturities = set()
-
-        for _, row in curve_set_df.iterrows():
-            maturity = pydatetime_to_quantlib_date(row["maturity_date"])
-            if maturity in seen_maturities:
-                continue
-            seen_maturities.add(maturity)
-
-            schedule = ql.Schedule(
-                bond_settlement_date,
-                maturity,
-                ql.Period(frequency),
-                self.calendar,
-                ql.ModifiedFollowing,
-                ql.ModifiedFollowing,
-                ql.DateGeneration.Backward,
-                False,
-            )
+
+        for bond_id, maturity_serial, price, coupon in zip(bonds.index.tolist(),
+                                                           maturity_serials[order].tolist(),
+                                                           bonds["price"].tolist(),
+                                                           bonds["coupon"].tolist()):
+            if use_quote_pool:
+                quote = self._quote_pool.get(bond_id)
+                if quote is None:
+                    quote = self._quote_pool[bond_id] = ql.SimpleQuote(price)
+                else:
+                    quote.setValue(price)
+            else:
+                quote = ql.SimpleQuote(price)
+
+            schedule = _make_schedule(settlement_serial, maturity_serial, self.calendar)
             helper = ql.FixedRateBondHelper(
-                ql.QuoteHandle(ql.SimpleQuote(row["price"])),
-                t_plus,
+                ql.QuoteHandle(quote),
+                _SETTLEMENT_DAYS,
                 par,
                 schedule,
-                [row["coupon"] / 100],
+                [coupon / 100],
                 day_count,
                 ql.ModifiedFollowing,
                 par,
@@ -118,11 +166,11 @@ class SpotRatesCalculator:
         elif freq == 'tenors':
             splcd = get_spot_rates_on_tenors(yc, day_count)
         elif freq == 'daily':
-            splcd = get_daily_spot_rates
+            splcd = get_daily_spot_rates(yc, day_count)
 
         return splcd
 
-    def apply_bootstrapper(self, data, freq = 'monthly'):
+    def apply_bootstrapper(self, data, freq = 'monthly', n_jobs=1):
         """
         Apply yield curve bootstrapping to a dataset of bond data.
 
@@ -136,6 +184,9 @@ class SpotRatesCalculator:
                     - 'monthly': Spot rates are calculated monthly.
                     - 'tenors': Spot rates are calculated at the specific bond tenors.
                 Default is 'monthly'.
+            n_jobs (int, optional):
+                Number of worker processes used to bootstrap the dates in parallel. 1 runs in the current
+                process and -1 uses all available cores. Default is 1.
 
         Returns:
             pd.DataFrame:
@@ -145,25 +196,38 @@ class SpotRatesCalculator:
             - The input data is first processed using `process_data()` to ensure consistency.
             - For each date, the most liquid bond in each time-to-maturity interval is selected.
             - The `curve_bootstrapper` function is then applied to calculate spot rates.
+            - With n_jobs != 1 the dates are spread across worker processes; each worker only receives
+              the bonds of the dates it bootstraps, and bootstraps them with its own calculator (with the
+              default calendar), which lives as long as the worker pool of this call.
         """
-        results_list = []
-
         # process data
         data = process_data(data)
 
-        for date in tqdm(data.index.get_level_values(0).unique()):
-            curve_set_df = data.loc[date]
-            most_liquid = get_most_liquid_bond_by_interval(curve_set_df)
-            zero_rate_curve = self.curve_bootstrapper(most_liquid, date, freq)
-            zero_rate_curve["Date"] = date
-            results_list.append(zero_rate_curve[1:])
-
-        final_df = pd.concat(results_list)
-        final_df.set_index(["Date"], inplace=True)
+        # Each date's curve only depends on that date's bonds, so the dates can be bootstrapped independently
+        dates = []
+        curve_sets = []
+        for date, curve_set_df in data.groupby(level=0, sort=False):
+            dates.append(date)
+            curve_sets.append(curve_set_df.droplevel(0))
+
+        # In this process the dates are bootstrapped by this calculator; worker processes use their own
+        bootstrap = partial(_bootstrap_one, self) if n_jobs == 1 else _bootstrap_in_worker
+        results_list = parallel_map(bootstrap, dates, curve_sets, [freq] * len(dates),
+                                    n_jobs=n_jobs, desc="Bootstrapping spot curves")
+
+        # Build the output once from the stacked curves, instead of concatenating one frame per date
+        n_maturities = [len(maturities) for maturities, _ in results_list]
+        final_df = pd.DataFrame(
+            {
+                "Maturities": np.concatenate([maturities for maturities, _ in results_list]),
+                "Curve": np.concatenate([curve for _, curve in results_list]),
+            },
+            index=pd.Index(dates, name="Date").repeat(n_maturities),
+        )
 
         return final_df
 
-    def apply_nelson_siegel(self, curve_df, ridge=False, alpha=0.1):
+    def apply_nelson_siegel(self, curve_df, ridge=False, alpha=0.1, n_jobs=1):
         """
         Apply the Nelson-Siegel model to a dataset to fit yield curves.
 
@@ -178,6 +242,9 @@ class SpotRatesCalculator:
             alpha (float, optional):
                 Regularization parameter for ridge regression. Only used if ridge=True.
                 Default is 0.1.
+            n_jobs (int, optional):
+                Number of worker processes used to fit the dates in parallel. 1 fits in the current
+                process and -1 uses all available cores. Default is 1.
 
         Returns:
             pd.DataFrame:
@@ -197,31 +264,28 @@ class SpotRatesCalculator:
             fitted_params = apply_nelson_siegel(curve_df, ridge=True, alpha=0.1)
             print(fitted_params.head())
         """
-        fitted_results = []
+        dates = []
+        maturities_list = []
+        yields_list = []
 
-        for date in tqdm(curve_df.index.get_level_values(0).unique()):
-            spot_curve = curve_df.loc[date]
-            maturities = spot_curve["Maturities"].values
-            yields = spot_curve["Curve"].values
+        for date, spot_curve in curve_df.groupby(level=0, sort=False):
+            dates.append(date)
+            maturities_list.append(spot_curve["Maturities"].values)
+            yields_list.append(spot_curve["Curve"].values)
 
-            params = fit_nelson_siegel(
-                maturities=maturities, yields=yields, ridge=ridge, alpha=alpha
-            )
-
-            fitted_results.append({
-                "Date": date,
-                "Beta0 (Level)": params[0],
-                "Beta1 (Slope)": params[1],
-                "Beta2 (Curvature)": params[2],
-                "Lambda": params[3],
-            })
+        params = fit_nelson_siegel_batch(
+            maturities_list, yields_list, ridge=ridge, alpha=alpha, n_jobs=n_jobs
+        )
 
-        fitted_results_df = pd.DataFrame(fitted_results)
-        fitted_results_df.set_index("Date", inplace=True)
+        fitted_results_df = pd.DataFrame(
+            params,
+            index=pd.Index(dates, name="Date"),
+            columns=["Beta0 (Level)", "Beta1 (Slope)", "Beta2 (Curvature)", "Lambda"],
+        )
 
         return fitted_results_df
 
-    def apply_nelson_siegel_svensonn(self, curve_df, ridge = False, alpha=0.1):
+    def apply_nelson_siegel_svensonn(self, curve_df, ridge = False, alpha=0.1, n_jobs=1):
         """
         Apply the Nelson-Siegel-Svensson model to a dataset to fit yield curves.
 
@@ -236,6 +300,9 @@ class SpotRatesCalculator:
             alpha (float, optional):
                 Regularization parameter for ridge regression. Only used if ridge=True.
                 Default is 0.1.
+            n_jobs (int, optional):
+                Number of worker processes used to fit the dates in parallel. 1 fits in the current
+                process and -1 uses all available cores. Default is 1.
 
         Returns:
             pd.DataFrame:
@@ -259,38 +326,34 @@ class SpotRatesCalculator:
             fitted_params = apply_nelson_siegel_svensonn(curve_df, ridge=True, alpha=0.1)
             print(fitted_params.head())
         """
-        fitted_results = []
-
-        for date in tqdm(curve_df.index.get_level_values(0).unique()):
-            spot_curve = curve_df.loc[date]
-            maturities = spot_curve["Maturities"].values
-            yields = spot_curve["Curve"].values
-
-            params = fit_nelson_siegel_svensson(
-                maturities=maturities, yields=yields, ridge=ridge, alpha=alpha
-            )
-
-            fitted_results.append({
-                "Date": date,
-                "Beta0 (Level)": params[0],
-                "Beta1 (Slope)": params[1],
-                "Beta2 (Curvature)": params[2],
-                "Beta3 (Second Curvature)": params[3],
-                "Lambda1": params[4],
-                "Lambda2": params[5],
-            })
-
-        fitted_results_df = pd.DataFrame(fitted_results)
-        fitted_results_df.set_index("Date", inplace=True)
+        dates = []
+        maturities_list = []
+        yields_list = []
+
+        for date, spot_curve in curve_df.groupby(level=0, sort=False):
+            dates.append(date)
+            maturities_list.append(spot_curve["Maturities"].values)
+            yields_list.append(spot_curve["Curve"].values)
+
+        params = fit_nelson_siegel_svensson_batch(
+            maturities_list, yields_list, ridge=ridge, alpha=alpha, n_jobs=n_jobs
+        )
+
+        fitted_results_df = pd.DataFrame(
+            params,
+            index=pd.Index(dates, name="Date"),
+            columns=["Beta0 (Level)", "Beta1 (Slope)", "Beta2 (Curvature)", "Beta3 (Second Curvature)",
+                     "Lambda1", "Lambda2"],
+        )
 
         return fitted_results_df
 
-    def interpolate_nelson_siegel(self, loadings_df, freq = 'monthly'):
+    def interpolate_nelson_siegel(self, loadings_df, freq = 'monthly', dtype=np.float64):
         """
         Interpolate yield curves using the Nelson-Siegel (NS) model for a given set of parameters over a specified frequency.
 
-        This function iterates over all dates in the provided loadings DataFrame, computes the interpolated yield curve for a range of maturities
-        using the NS formula, and returns the results in a structured DataFrame. The interpolation frequency (e.g., monthly, daily, or quarterly)
+        This function evaluates the NS formula for all dates in the provided loadings DataFrame at once over a range of maturities,
+        and returns the results in a structured DataFrame. The interpolation frequency (e.g., monthly, daily, or quarterly)
         determines the granularity of the interpolated curves.
 
         Parameters:
@@ -303,6 +366,11 @@ class SpotRatesCalculator:
                     - 'daily': Interpolates 361*30 maturities over 30 years (~daily intervals).
                     - 'quarterly': Interpolates 121 maturities over 30 years (~quarterly intervals).
                 Default is 'monthly'.
+            dtype (numpy dtype, optional):
+                Floating-point type in which the interpolated curves and maturities are stored. The curves are
+                always evaluated in double precision; np.float32 halves the memory of large outputs (e.g. 'daily'
+                over many dates) and is precise enough for reporting and plotting. Keep np.float64 for anything
+                fed back into fitting. Default is np.float64.
 
         Returns:
             pd.DataFrame:
@@ -310,37 +378,31 @@ class SpotRatesCalculator:
                     - "Curve": A list of interpolated yields for each maturity.
                     - "Maturities": A list of maturities corresponding to the interpolated yields.
         """
-        fitted_results = []
-        for date in tqdm(loadings_df.index.get_level_values(0).unique()):
-            current_loadings = loadings_df.loc[date]
-            if freq == 'monthly':
-                maturities = np.linspace(0, 30, 361)
-                interpolated_curve = [nelson_siegel(current_loadings, t) for t in maturities]
-            elif freq == 'daily':
-                maturities = np.linspace(0, 30, 361 * 30)
-                interpolated_curve = [nelson_siegel(current_loadings, t) for t in maturities]
-            elif freq == 'quarterly':
-                maturities = np.linspace(0, 30, 121)
-                interpolated_curve = [nelson_siegel(current_loadings, t) for t in maturities]
-
-            fitted_results.append(pd.DataFrame({
-                "Date": date,
-                "Curve": interpolated_curve,
-                "Maturities": maturities,
-            }))
-
-        fitted_results_df = pd.concat(fitted_results)
-        fitted_results_df.set_index("Date", inplace=True)
+        maturities = _MATURITIES_BY_FREQ[freq]
+
+        # Evaluate all dates at once: each parameter becomes a (n_dates, 1) column that broadcasts
+        # against the maturities into a (n_dates, n_maturities) array of curves
+        dates = loadings_df.index.get_level_values(0)
+        params = loadings_df.to_numpy(dtype=float).T[:, :, np.newaxis]
+        interpolated_curves = nelson_siegel(params, maturities).astype(dtype, copy=False)
+
+        fitted_results_df = pd.DataFrame(
+            {
+                "Curve": interpolated_curves.ravel(),
+                "Maturities": np.tile(maturities.astype(dtype, copy=False), len(dates)),
+            },
+            index=pd.Index(dates.repeat(len(maturities)), name="Date"),
+        )
 
         return fitted_results_df
 
 
-    def interpolate_nelson_siegel_svensson(self, loadings_df, freq = 'monthly'):
+    def interpolate_nelson_siegel_svensson(self, loadings_df, freq = 'monthly', dtype=np.float64):
         """
         Interpolate yield curves using the Nelson-Siegel-Svensson (NSS) model for a given set of parameters over a specified frequency.
 
-        This function iterates over all dates in the provided loadings DataFrame, computes the interpolated yield curve for a range of maturities
-        using the NSS formula, and returns the results in a structured DataFrame. The interpolation frequency (e.g., monthly, daily, or quarterly)
+        This function evaluates the NSS formula for all dates in the provided loadings DataFrame at once over a range of maturities,
+        and returns the results in a structured DataFrame. The interpolation frequency (e.g., monthly, daily, or quarterly)
         determines the granularity of the interpolated curves.
 
         Parameters:
@@ -353,6 +415,11 @@ class SpotRatesCalculator:
                     - 'daily': Interpolates 361*30 maturities over 30 years (~daily intervals).
                     - 'quarterly': Interpolates 121 maturities over 30 years (~quarterly intervals).
                 Default is 'monthly'.
+            dtype (numpy dtype, optional):
+                Floating-point type in which the interpolated curves and maturities are stored. The curves are
+                always evaluated in double precision; np.float32 halves the memory of large outputs (e.g. 'daily'
+                over many dates) and is precise enough for reporting and plotting. Keep np.float64 for anything
+                fed back into fitting. Default is np.float64.
 
         Returns:
             pd.DataFrame:
@@ -360,28 +427,45 @@ class SpotRatesCalculator:
                     - "Curve": A list of interpolated yields for each maturity.
                     - "Maturities": A list of maturities corresponding to the interpolated yields.
         """
-        fitted_results = []
-        for date in tqdm(loadings_df.index.get_level_values(0).unique()):
-            current_loadings = loadings_df.loc[date]
-            if freq == 'monthly':
-                maturities = np.linspace(0, 30, 361)
-                interpolated_curve = [nelson_siegel_svensson(current_loadings, t) for t in maturities]
-            elif freq == 'daily':
-                maturities = np.linspace(0, 30, 361*30)
-                interpolated_curve = [nelson_siegel_svensson(current_loadings, t) for t in maturities]
-            elif freq == 'quarterly':
-                maturities = np.linspace(0, 30, 121)
-                interpolated_curve = [nelson_siegel_svensson(current_loadings, t) for t in maturities]
-
-            fitted_results.append(pd.DataFrame({
-                "Date": date,
-                "Curve" : interpolated_curve,
-                "Maturities" : maturities,
-            }))
-
-        fitted_results_df = pd.concat(fitted_results)
-        fitted_results_df.set_index("Date", inplace=True)
+        maturities = _MATURITIES_BY_FREQ[freq]
+
+        # Evaluate all dates at once: each parameter becomes a (n_dates, 1) column that broadcasts
+        # against the maturities into a (n_dates, n_maturities) array of curves
+        dates = loadings_df.index.get_level_values(0)
+        params = loadings_df.to_numpy(dtype=float).T[:, :, np.newaxis]
+        interpolated_curves = nelson_siegel_svensson(params, maturities).astype(dtype, copy=False)
+
+        fitted_results_df = pd.DataFrame(
+            {
+                "Curve": interpolated_curves.ravel(),
+                "Maturities": np.tile(maturities.astype(dtype, copy=False), len(dates)),
+            },
+            index=pd.Index(dates.repeat(len(maturities)), name="Date"),
+        )
 
         return fitted_results_df
 
 
+def _bootstrap_one(calculator, date, curve_set_df, freq):
+    """
+    Bootstraps the spot rates of a single date from `curve_set_df`, the bonds available on `date`, with
+    `calculator`, for `apply_bootstrapper`, and returns them as (maturities, curve) arrays.
+    """
+    most_liquid = get_most_liquid_bond_by_interval(curve_set_df)
+    zero_rate_curve = calculator.curve_bootstrapper(most_liquid, date, freq)[1:]
+
+    return zero_rate_curve["Maturities"].to_numpy(), zero_rate_curve["Curve"].to_numpy()
+
+
+@lru_cache(maxsize=None)
+def _worker_calculator():
+    """
+    SpotRatesCalculator of a worker process, shared by the dates it bootstraps so that its quotes are reused.
+    The workers only live as long as the pool of one `apply_bootstrapper` call, and so does the calculator.
+    """
+    return SpotRatesCalculator()
+
+
+def _bootstrap_in_worker(date, curve_set_df, freq):
+    """`_bootstrap_one` with the worker's calculator; defined at module level so that it can run in a worker."""
+    return _bootstrap_one(_worker_calculator(), date, curve_set_df, freq)
@@ -1,7 +1,31 @@
 from tqdm import tqdm
-import statsmodels.api as sm
 import numpy as np
 import pandas as pd
+from scipy.linalg import lstsq
+
+def _build_X(n, *cols):
+    """Design matrix [1, cols...] of n observations, allocated column-major as LAPACK expects."""
+    X = np.empty((n, len(cols) + 1), order='F')
+    X[:, 0] = 1.0
+    for i, c in enumerate(cols):
+        X[:, i + 1] = c
+    return X
+
+# Largest condition number of X'X for which the normal equations are solved directly; the normal equations
+# square the condition number of X, so above ~1/sqrt(eps) they would lose about half of the digits
+_MAX_NORMAL_EQUATIONS_COND = 1e8
+
+def _solve_ols(X, y):
+    """
+    OLS coefficients from the normal equations X'X b = X'y: with 3-4 regressors X'X is tiny, so this is
+    much cheaper than an SVD of X. Falls back to `lstsq` when X'X is singular or ill-conditioned (e.g.
+    nearly collinear NSS loadings when lambda1 ~ lambda2).
+    """
+    XtX = X.T @ X
+    eigenvalues = np.linalg.eigvalsh(XtX)  # ascending; X'X is symmetric positive semi-definite
+    if eigenvalues[0] > eigenvalues[-1] / _MAX_NORMAL_EQUATIONS_COND:
+        return np.linalg.solve(XtX, X.T @ y)
+    return lstsq(X, y, lapack_driver="gelsd")[0]
 
 def cross_sectional_regression_nelson_siegel(df, loadings_df, nss = False):
     """
@@ -36,10 +60,12 @@ def cross_sectional_regression_nelson_siegel(df, loadings_df, nss = False):
         Methodology:
         -----------
         1. For each date in the dataset:
-            a. Filter bonds with available data (`dropna()`).
+            a. Filter bonds with available time to maturity and excess returns (`dropna()` on
+               those two columns only).
             b. Compute the Nelson-Siegel factor loadings (`f1` and `f2`) based on the
                time to maturity (`t`) and the lambda parameter from `loadings_df`.
-            c. Perform an Ordinary Least Squares (OLS) regression:
+            c. Perform an Ordinary Least Squares (OLS) regression, solved directly from the
+               normal equations:
                \[
                y_t = \beta_0 + \beta_1 f1_t + \beta_2 f2_t + \epsilon_t
                \]
@@ -52,64 +78,84 @@ def cross_sectional_regression_nelson_siegel(df, loadings_df, nss = False):
         ------
         - The lambda parameter (\( \lambda \)) controls the Nelson-Siegel factor loadings
           and must be provided for each date in `loadings_df`.
-        - Bonds with missing values for excess returns or time to maturity are excluded
-          from the regression for that date.
+        - Bonds with missing values for excess returns or time to maturity, or with
+          non-finite factor loadings (e.g. zero time to maturity), are excluded from the
+          regression for that date.
     """
     results = []
     count = 0
-    for date in tqdm(df.index.get_level_values(0).unique()):
-        ex = df.loc[date].dropna()
-        params = loadings_df.loc[date]
+
+    # Lambdas of each date, looked up by date in the loop
+    if nss == True:
+        lambdas = loadings_df[['Lambda1', 'Lambda2']].to_dict('index')
+    else:
+        lambdas = loadings_df[['Lambda']].to_dict('index')
+
+    for date, ex in tqdm(df.groupby(level=0, sort=False)):
+        ex = ex[['time to maturity', 'Excess Returns']].dropna()
         if len(ex) == 0:  # Skip if no data is available for this date
             continue
 
+        params = lambdas[date]
         if nss == True:
-            lambda1 = params.loc['Lambda1']
-            lambda2 = params.loc['Lambda2']
+            lambda1 = params['Lambda1']
+            lambda2 = params['Lambda2']
         else:
-            lambda1 = params.loc['Lambda']
+            lambda1 = params['Lambda']
 
-        t = ex['time to maturity']
-
-        # Compute Nelson-Siegel factor loadings
-        ex['f1'] = (1 - np.exp(-t/lambda1))/(t/lambda1)
-        ex['f2'] = (1 - np.exp(-t / lambda1)) / (t / lambda1) - np.exp(-t / lambda1)
-        if nss == True:
-            ex['f3'] = (1 - np.exp(-t / lambda2)) / (t / lambda2) - np.exp(-t / lambda2)
+        t = ex['time to maturity'].to_numpy()
+        y = ex['Excess Returns'].to_numpy()
 
-        if len(ex) == 0:  # Ensure data is still available after filtering
-            continue
-
-        y = ex['Excess Returns']
+        # Compute Nelson-Siegel factor loadings, with one exponential per lambda
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u1 = t / lambda1
+            e1 = np.exp(-u1)
+            f1 = (1 - e1) / u1
+            f2 = f1 - e1
+            if nss == True:
+                u2 = t / lambda2
+                e2 = np.exp(-u2)
+                f3 = (1 - e2) / u2 - e2
+                factors = [f1, f2, f3]
+            else:
+                factors = [f1, f2]
 
-        if nss == True:
-            X = sm.add_constant(ex[['f1', 'f2', 'f3']])
-        else:
-            X = sm.add_constant(ex[['f1', 'f2']])
+        # Drop bonds whose return or loadings are not finite (e.g. zero time to maturity)
+        finite = np.isfinite(y)
+        for f in factors:
+            finite &= np.isfinite(f)
+        n = np.count_nonzero(finite)
 
-        if X.empty or y.empty:  # Ensure X and y are non-empty
+        if n == 0:  # Ensure data is still available after filtering
             continue
 
+        y = y[finite]
+        X = _build_X(n, *(f[finite] for f in factors))
+
         try:
-            # Fit the regression model
-            model = sm.OLS(y, X).fit()
+            # Fit the regression model; only the coefficients and the R-squared are kept
+            coefficients = _solve_ols(X, y)
+            residuals = y - X @ coefficients
+            centered_y = y - y.mean()
+            r_squared = 1 - (residuals @ residuals) / (centered_y @ centered_y)
+
             # Store results
             if nss == True:
                 results.append({
                     'date': date,
-                    'const': model.params.get('const', np.nan),
-                    'beta1': model.params.get('f1', np.nan),
-                    'beta2': model.params.get('f2', np.nan),
-                    'beta3': model.params.get('f3', np.nan),
-                    'r_squared': model.rsquared
+                    'const': coefficients[0],
+                    'beta1': coefficients[1],
+                    'beta2': coefficients[2],
+                    'beta3': coefficients[3],
+                    'r_squared': r_squared
                 })
             else:
                 results.append({
                     'date': date,
-                    'const': model.params.get('const', np.nan),
-                    'beta1': model.params.get('f1', np.nan),
-                    'beta2': model.params.get('f2', np.nan),
-                    'r_squared': model.rsquared
+                    'const': coefficients[0],
+                    'beta1': coefficients[1],
+                    'beta2': coefficients[2],
+                    'r_squared': r_squared
                 })
         except Exception as e:
             # Handle any unexpected errors during regression
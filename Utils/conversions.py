@@ -1,4 +1,5 @@
 import QuantLib as ql
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -8,4 +9,9 @@ def pydatetime_to_quantlib_date(py_datetime: datetime) -> ql.Date:
 
 def quantlib_date_to_pydatetime(ql_date: ql.Date):
     """Convert QuantLib Date to Python datetime."""
-    return datetime(ql_date.year(), ql_date.month(), ql_date.dayOfMonth())
\ No newline at end of file
+    return datetime(ql_date.year(), ql_date.month(), ql_date.dayOfMonth())
+
+def datetimes_to_quantlib_serials(datetimes):
+    """Convert an array of datetimes to QuantLib Date serial numbers (days since 1899-12-30), at once."""
+    days = np.asarray(datetimes, dtype="datetime64[D]")
+    return (days - np.datetime64("1899-12-30", "D")).astype(np.int64)
@@ -23,28 +23,24 @@ def filter_on_the_run_bonds(df):
 def get_most_liquid_bond_by_interval(df, max_years=30):
     """gets the most liquid bond for each year of time to maturity"""
 
-    df = df.loc[df["time to maturity"] > 0.02].copy() # Discard smallest maturities
-    filtered_bonds = []  # List to store the selected bonds
-    first_bond = df.sort_values(by='time to maturity', ascending=True).iloc[0]
-    filtered_bonds.append(first_bond) # Add bond with smallest maturity - will be useful for interpolation
+    df = df.loc[df["time to maturity"] > 0.02] # Discard smallest maturities
 
-    # Iterate over each yearly interval
-    for year in range(max_years):
-        lower_bound = year
-        upper_bound = year + 1
+    # Bond with smallest maturity - will be useful for interpolation
+    first_bond = np.argmin(df["time to maturity"].to_numpy())
 
-        # Filter bonds in the current time-to-maturity interval
-        interval_bonds = df[(df['time to maturity'] > lower_bound) & (df['time to maturity'] <= upper_bound)]
+    # Yearly time-to-maturity interval (year, year + 1] of each bond; bonds beyond max_years are left out
+    ttm = df["time to maturity"].to_numpy()
+    intervals = np.ceil(ttm).astype(int) - 1
+    in_range = np.flatnonzero(intervals < max_years)
 
-        if not interval_bonds.empty:
-            # Sort bonds by issue_date in descending order and select the latest issued bond
-            latest_bond = interval_bonds.sort_values(by='issue_date', ascending=False).iloc[0]
-            filtered_bonds.append(latest_bond)
+    # Sort the bonds by issue date, latest first (ties keep their order, missing dates go last), so that
+    # the first bond of each interval in that order is its latest issued bond
+    issue_dates = df["issue_date"].to_numpy().astype("datetime64[ns]").astype(np.int64)[in_range]
+    order = in_range[np.lexsort((-in_range, issue_dates))[::-1]]
+    _, first_in_interval = np.unique(intervals[order], return_index=True)
+    latest_bonds = order[first_in_interval]
 
     # Combine the selected bonds into a single DataFrame
-    result_df = pd.DataFrame(filtered_bonds)
+    result_df = df.iloc[np.concatenate([[first_bond], latest_bonds])]
 
     return result_df
-
-
-
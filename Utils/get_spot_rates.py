@@ -1,68 +1,117 @@
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import QuantLib as ql
 
-def get_spot_rates_on_tenors(yieldcurve, day_count):
-    """Generate spot rates on specific tenors for given yield curve."""
-    spots = []
-    tenors = []
+# Compounding of the returned spot rates: compounded, twice a year
+_COMPOUNDING = ql.Compounded
+_FREQUENCY = ql.Semiannual
+
+_DEFAULT_CALENDAR = ql.UnitedStates(ql.UnitedStates.GovernmentBond)
+
+@lru_cache(maxsize=None)
+def _tenor_grid(n_points, points_per_year):
+    """
+    Regular grid of `n_points` tenors, in years, with `points_per_year` points per year, without its first
+    (zero) tenor, which the spot rates leave out. The grid is the same for every curve it is used on, so it is
+    built once and shared (read-only).
+    """
+    tenors = np.arange(1, n_points) / points_per_year
+    tenors.setflags(write=False)
+    return tenors
+
+
+def _spot_rates(yieldcurve, tenors):
+    """
+    Spot rates of `yieldcurve` (in percent) at `tenors`, an array of positive year fractions of the curve, as
+    the "Maturities"/"Curve" frame returned by the functions below.
+
+    Used when `day_count` is the curve's own day counter: the curve's zero rates are then already expressed
+    with it, so no `equivalentRate` conversion is needed. Only the discount factors are read from the curve,
+    one call per tenor; they are converted to compounded rates for all tenors at once, as `zeroRate` would:
+    r = f * ((1 / D(t)) ** (1 / (f * t)) - 1).
+    """
+    discounts = np.fromiter(map(yieldcurve.discount, tenors.tolist()), dtype=float, count=len(tenors))
+
+    # (1 / D) ** (1 / (f * t)) - 1 as expm1(-log(D) / (f * t)): no power, and no cancellation for small rates
+    frequency = float(_FREQUENCY)
+    spots = np.log(discounts)
+    spots *= -1 / (frequency * tenors)
+    np.expm1(spots, out=spots)
+    spots *= 100 * frequency
+
+    return pd.DataFrame({"Maturities": tenors, "Curve": spots}, index=[''] * len(tenors))
+
+
+def _equivalent_spot_rates(yieldcurve, day_count, tenors, dates):
+    """
+    Spot rates of `yieldcurve` (in percent) at `tenors`, converted with `equivalentRate` to `day_count` over
+    the period from the reference date to the matching `dates`, for a day count other than the curve's own.
+    Returns the same frame as `_spot_rates`.
+    """
     ref_date = yieldcurve.referenceDate()
-    dates = yieldcurve.dates()
+    zero_rate = yieldcurve.zeroRate
+    compounding, frequency = _COMPOUNDING, _FREQUENCY
 
-    for i, d in enumerate(dates):
-        yrs = day_count.yearFraction(ref_date, d)
-        compounding = ql.Compounded
-        freq = ql.Semiannual
+    spots = np.fromiter(
+        (zero_rate(yrs, compounding, frequency).equivalentRate(day_count, compounding, frequency, ref_date, d).rate()
+         for yrs, d in zip(tenors.tolist(), dates)),
+        dtype=float,
+        count=len(tenors),
+    )
+    spots *= 100
 
-        zero_rate = yieldcurve.zeroRate(yrs, compounding, freq)
-        eq_rate = zero_rate.equivalentRate(day_count, compounding, freq, ref_date, d).rate()
-        tenors.append(yrs)
-        spots.append(100 * eq_rate)
+    return pd.DataFrame({"Maturities": tenors, "Curve": spots}, index=[''] * len(tenors))
 
-    return pd.DataFrame(list(zip(tenors, spots)), columns=["Maturities", "Curve"], index=[''] * len(tenors))[1:]
+
+def get_spot_rates_on_tenors(yieldcurve, day_count):
+    """
+    Generate spot rates on specific tenors for given yield curve.
+
+    The tenors are the curve's pillar dates; when `day_count` is the curve's own day counter (as for the
+    bootstrapped curves), their year fractions are the pillar times the curve already holds.
+    """
+    # The first pillar is the reference date of the curve, which is left out
+    if day_count == yieldcurve.dayCounter():
+        return _spot_rates(yieldcurve, np.array(yieldcurve.times()[1:]))
+
+    ref_date = yieldcurve.referenceDate()
+    year_fraction = day_count.yearFraction
+    dates = yieldcurve.dates()[1:]
+    tenors = np.fromiter((year_fraction(ref_date, d) for d in dates), dtype=float, count=len(dates))
+
+    return _equivalent_spot_rates(yieldcurve, day_count, tenors, dates)
 
 
 def get_monthly_spot_rates(yieldcurve, day_count,
-                   calendar=ql.UnitedStates(ql.UnitedStates.GovernmentBond), months=361):
-    """Generate monthly spot rates for given yield curve."""
-    spots = []
-    tenors = []
+                   calendar=_DEFAULT_CALENDAR, months=361):
+    """
+    Generate monthly spot rates for given yield curve.
+
+    With the curve's own day counter the tenors are year fractions of the curve and no dates are needed;
+    `calendar` only gives the dates over which the rates are converted to any other `day_count`.
+    """
+    tenors = _tenor_grid(months, 12.0)
+    if day_count == yieldcurve.dayCounter():
+        return _spot_rates(yieldcurve, tenors)
+
     ref_date = yieldcurve.referenceDate()
-    for month in range(0, months):
-        yrs = month / 12.0
-        d = calendar.advance(ref_date, ql.Period(month, ql.Months))
-        compounding = ql.Compounded
-        freq = ql.Semiannual
-
-        zero_rate = yieldcurve.zeroRate(yrs, compounding, freq)
-        eq_rate = zero_rate.equivalentRate(
-                day_count, compounding, freq, ref_date, d
-            ).rate()
-        tenors.append(yrs)
-        spots.append(100 * eq_rate)
-
-    return pd.DataFrame(list(zip(tenors, spots)),
-                        columns=["Maturities", "Curve"],
-                        index=[''] * len(tenors))[1:]
+    dates = [calendar.advance(ref_date, ql.Period(month, ql.Months)) for month in range(1, months)]
+    return _equivalent_spot_rates(yieldcurve, day_count, tenors, dates)
 
 def get_daily_spot_rates(yieldcurve, day_count,
-                   calendar=ql.UnitedStates(ql.UnitedStates.GovernmentBond), days=361*30):
-    """Generate daily spot rates for given yield curve."""
-    spots = []
-    tenors = []
+                   calendar=_DEFAULT_CALENDAR, days=361*30):
+    """
+    Generate daily spot rates for given yield curve.
+
+    With the curve's own day counter the tenors are year fractions of the curve and no dates are needed;
+    for any other `day_count` the rates are converted over calendar days from the reference date, matching
+    the daily tenors. `calendar` is no longer used and is kept for compatibility.
+    """
+    tenors = _tenor_grid(days, 365.25)
+    if day_count == yieldcurve.dayCounter():
+        return _spot_rates(yieldcurve, tenors)
+
     ref_date = yieldcurve.referenceDate()
-    for day in range(0, days):
-        yrs = day / 12.0
-        d = calendar.advance(ref_date, ql.Period(day, ql.Days))
-        compounding = ql.Compounded
-        freq = ql.Semiannual
-
-        zero_rate = yieldcurve.zeroRate(yrs, compounding, freq)
-        eq_rate = zero_rate.equivalentRate(
-                day_count, compounding, freq, ref_date, d
-            ).rate()
-        tenors.append(yrs)
-        spots.append(100 * eq_rate)
-
-    return pd.DataFrame(list(zip(tenors, spots)),
-                        columns=["Maturities", "Curve"],
-                        index=[''] * len(tenors))[1:]
\ No newline at end of file
+    dates = [ref_date + day for day in range(1, days)]
+    return _equivalent_spot_rates(yieldcurve, day_count, tenors, dates)
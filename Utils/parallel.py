@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+
+def parallel_map(func, *iterables, n_jobs=1, desc=None):
+    """
+    Apply a function to the items of one or more iterables, optionally across worker processes.
+
+    Parameters:
+        func (callable):
+            The function to apply. It must be picklable (i.e. defined at module level) when n_jobs != 1.
+        *iterables:
+            Iterables whose items are passed to `func` as positional arguments, as in the built-in `map`.
+        n_jobs (int, optional):
+            Number of worker processes. 1 runs everything in the current process and -1 uses all
+            available cores. Default is 1.
+        desc (str, optional):
+            Description of the tqdm progress bar. If None, no progress bar is shown.
+
+    Returns:
+        list:
+            The results of `func`, in the same order as the inputs.
+
+    Notes:
+        - Each task must be independent of the others, since tasks run in separate processes.
+        - Tasks are sent to the workers in chunks to amortize the inter-process communication
+          when there are many small tasks (e.g. one yield curve fit per date).
+    """
+    iterables = [list(iterable) for iterable in iterables]
+    n_tasks = len(iterables[0]) if iterables else 0
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs == 1:
+        return list(tqdm(map(func, *iterables), total=n_tasks, desc=desc, disable=desc is None))
+
+    chunksize = max(1, n_tasks // (4 * n_jobs))
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        results = executor.map(func, *iterables, chunksize=chunksize)
+        return list(tqdm(results, total=n_tasks, desc=desc, disable=desc is None))